@@ -1,6 +1,3 @@
-from collections import OrderedDict
-from types import MethodType
-
 from pyparsing import ParseResults, TokenConverter, originalTextFor
 
 from rdflib import BNode, Variable
@@ -37,6 +34,11 @@ the resulting CompValue
 
 # Comp('Sum')( Param('x')(Number) + '+' + Param('y')(Number) )
 
+# sentinel for missing keys in CompValue attribute lookup
+_MISSING = object()
+
+_VAR_TYPES = (BNode, Variable)
+
 
 def value(ctx, val, variables=False, errors=False):
     """
@@ -51,15 +53,12 @@ def value(ctx, val, variables=False, errors=False):
 
     """
 
-    if isinstance(val, Expr):
-        return val.eval(ctx)  # recurse?
-    elif isinstance(val, CompValue):
-        raise Exception("What do I do with this CompValue? %s" % val)
-
-    elif isinstance(val, list):
-        return [value(ctx, x, variables, errors) for x in val]
+    # unwrap single-element ParseResults without recursing
+    while isinstance(val, ParseResults) and len(val) == 1:
+        val = val[0]
 
-    elif isinstance(val, (BNode, Variable)):
+    # variables are by far the most common case, so check them first
+    if isinstance(val, _VAR_TYPES):
         r = ctx.get(val)
         if isinstance(r, SPARQLError) and not errors:
             raise r
@@ -72,8 +71,14 @@ def value(ctx, val, variables=False, errors=False):
         else:
             raise NotBoundError
 
-    elif isinstance(val, ParseResults) and len(val) == 1:
-        return value(ctx, val[0], variables, errors)
+    elif isinstance(val, Expr):
+        return val.eval(ctx)  # recurse?
+    elif isinstance(val, CompValue):
+        raise Exception("What do I do with this CompValue? %s" % val)
+
+    elif isinstance(val, list):
+        return [value(ctx, x, variables, errors) for x in val]
+
     else:
         return val
 
@@ -85,6 +90,8 @@ class ParamValue(object):
     All cleverness is in the CompValue
     """
 
+    __slots__ = ("isList", "name", "tokenList")
+
     def __init__(self, name, tokenList, isList):
         self.isList = isList
         self.name = name
@@ -126,10 +133,10 @@ class ParamList(Param):
 class plist(list):
     """this is just a list, but we want our own type to check for"""
 
-    pass
+    __slots__ = ()
 
 
-class CompValue(OrderedDict):
+class CompValue(dict):
 
     """
     The result of parsing a Comp
@@ -139,40 +146,41 @@ class CompValue(OrderedDict):
     """
 
     def __init__(self, name, **values):
-        OrderedDict.__init__(self)
+        dict.__init__(self)
         self.name = name
+        self.ctx = None
         self.update(values)
 
     def clone(self):
         return CompValue(self.name, **self)
 
     def __str__(self):
-        return self.name + "_" + OrderedDict.__str__(self)
+        return self.name + "_" + dict.__repr__(self)
 
     def __repr__(self):
         return self.name + "_" + dict.__repr__(self)
 
     def _value(self, val, variables=False, errors=False):
         if self.ctx is not None:
-            return value(self.ctx, val, variables)
+            return value(self.ctx, val, variables, errors)
         else:
             return val
 
     def __getitem__(self, a):
-        return self._value(OrderedDict.__getitem__(self, a))
+        return self._value(dict.__getitem__(self, a))
 
     def get(self, a, variables=False, errors=False):
-        return self._value(OrderedDict.get(self, a, a), variables, errors)
+        return self._value(dict.get(self, a, a), variables, errors)
 
     def __getattr__(self, a):
-        # Hack hack: OrderedDict relies on this
-        if a in ("_OrderedDict__root", "_OrderedDict__end"):
-            raise AttributeError()
-        try:
-            return self[a]
-        except KeyError:
+        v = dict.get(self, a, _MISSING)
+        if v is _MISSING:
             # raise AttributeError('no such attribute '+a)
             return None
+        ctx = self.ctx
+        if ctx is None:
+            return v
+        return value(ctx, v)
 
 
 class Expr(CompValue):
@@ -183,14 +191,13 @@ class Expr(CompValue):
     def __init__(self, name, evalfn=None, **values):
         super(Expr, self).__init__(name, **values)
 
-        self._evalfn = None
-        if evalfn:
-            self._evalfn = MethodType(evalfn, self)
+        # kept unbound, eval passes self explicitly
+        self._evalfn = evalfn
 
     def eval(self, ctx={}):
         try:
             self.ctx = ctx
-            return self._evalfn(ctx)
+            return self._evalfn(self, ctx)
         except SPARQLError as e:
             return e
         finally:
@@ -213,12 +220,13 @@ class Comp(TokenConverter):
         self.evalfn = None
 
     def postParse(self, instring, loc, tokenList):
-        if self.evalfn:
-            res = Expr(self.name)
-            res._evalfn = MethodType(self.evalfn, res)
+        name = self.name
+        evalfn = self.evalfn
+        if evalfn:
+            res = Expr(name, evalfn)
         else:
-            res = CompValue(self.name)
-            if self.name == "ServiceGraphPattern":
+            res = CompValue(name)
+            if name == "ServiceGraphPattern":
                 # Then this must be a service graph pattern and have
                 # already matched.
                 # lets assume there is one, for now, then test for two later.
@@ -226,12 +234,13 @@ class Comp(TokenConverter):
                 service_string = sgp.searchString(instring)[0][0]
                 res["service_string"] = service_string
 
+        # ParamValue is never subclassed, so compare the class directly
+        # rather than use isinstance
+        _ParamValue = ParamValue
         for t in tokenList:
-            if isinstance(t, ParamValue):
+            if t.__class__ is _ParamValue:
                 if t.isList:
-                    if t.name not in res:
-                        res[t.name] = plist()
-                    res[t.name].append(t.tokenList)
+                    res.setdefault(t.name, plist()).append(t.tokenList)
                 else:
                     res[t.name] = t.tokenList
                 # res.append(t.tokenList)
@@ -246,26 +255,48 @@ class Comp(TokenConverter):
 
 def prettify_parsetree(t, indent="", depth=0):
     out = []
-    if isinstance(t, ParseResults):
-        for e in t.asList():
-            out.append(prettify_parsetree(e, indent, depth + 1))
-        for k, v in sorted(t.items()):
-            out.append("%s%s- %s:\n" % (indent, "  " * depth, k))
-            out.append(prettify_parsetree(v, indent, depth + 1))
-    elif isinstance(t, CompValue):
-        out.append("%s%s> %s:\n" % (indent, "  " * depth, t.name))
-        for k, v in t.items():
-            out.append("%s%s- %s:\n" % (indent, "  " * (depth + 1), k))
-            out.append(prettify_parsetree(v, indent, depth + 2))
-    elif isinstance(t, dict):
-        for k, v in t.items():
-            out.append("%s%s- %s:\n" % (indent, "  " * (depth + 1), k))
-            out.append(prettify_parsetree(v, indent, depth + 2))
-    elif isinstance(t, list):
-        for e in t:
-            out.append(prettify_parsetree(e, indent, depth + 1))
-    else:
-        out.append("%s%s- %r\n" % (indent, "  " * depth, t))
+    # indentation strings by depth
+    indents = {}
+
+    def pad(depth):
+        try:
+            return indents[depth]
+        except KeyError:
+            indents[depth] = p = indent + "  " * depth
+            return p
+
+    # walk the tree with an explicit stack instead of recursing, the stack
+    # holds (node, depth) pairs still to be visited and lines ready for output
+    stack = [(t, depth)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+            continue
+
+        t, depth = item
+        todo = []
+        if isinstance(t, ParseResults):
+            for e in t.asList():
+                todo.append((e, depth + 1))
+            for k, v in sorted(t.items()):
+                todo.append(f"{pad(depth)}- {k}:\n")
+                todo.append((v, depth + 1))
+        elif isinstance(t, CompValue):
+            todo.append(f"{pad(depth)}> {t.name}:\n")
+            for k, v in t.items():
+                todo.append(f"{pad(depth + 1)}- {k}:\n")
+                todo.append((v, depth + 2))
+        elif isinstance(t, dict):
+            for k, v in t.items():
+                todo.append(f"{pad(depth + 1)}- {k}:\n")
+                todo.append((v, depth + 2))
+        elif isinstance(t, list):
+            for e in t:
+                todo.append((e, depth + 1))
+        else:
+            todo.append(f"{pad(depth)}- {t!r}\n")
+        stack.extend(reversed(todo))
     return "".join(out)
 
 
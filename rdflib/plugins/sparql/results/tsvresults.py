@@ -1,10 +1,16 @@
 """
 This implements the Tab Separated SPARQL Result Format
 
-It is implemented with pyparsing, reusing the elements from the SPARQL Parser
+It is implemented with pyparsing, reusing the elements from the SPARQL Parser.
+Rows are first split on tabs and the fields matched with regular expressions,
+pyparsing is only used for the header and for rows the fast path does not
+recognise.
 """
 
 import codecs
+import io
+import re
+from functools import lru_cache
 
 from pyparsing import (
     FollowedBy,
@@ -17,7 +23,10 @@ from pyparsing import (
     ZeroOrMore,
 )
 
+from rdflib import XSD, BNode
 from rdflib import Literal as RDFLiteral
+from rdflib import URIRef, Variable
+from rdflib.compat import decodeUnicodeEscape
 from rdflib.plugins.sparql.parser import (
     BLANK_NODE_LABEL,
     IRIREF,
@@ -26,12 +35,19 @@ from rdflib.plugins.sparql.parser import (
     STRING_LITERAL2,
     BooleanLiteral,
     NumericLiteral,
+    PN_CHARS_re,
+    PN_CHARS_U_re,
     Var,
+    neg,
 )
 from rdflib.plugins.sparql.parserutils import Comp, CompValue, Param
 from rdflib.query import Result, ResultParser
 
 ParserElement.setDefaultWhitespaceChars(" \n")
+# NOTE: packrat parsing (ParserElement.enablePackrat) is deliberately not
+# enabled here. It is a global pyparsing setting, so it would also apply to
+# the SPARQL query parser, which becomes about three times slower with it,
+# while only the rows not handled by _parse_row go through ROW.
 
 
 String = STRING_LITERAL1 | STRING_LITERAL2
@@ -47,8 +63,13 @@ RDFLITERAL = Comp(
 
 NONE_VALUE = object()
 
+
+def _empty_action(s, loc, tokens):
+    return NONE_VALUE
+
+
 EMPTY = FollowedBy(LineEnd()) | FollowedBy("\t")
-EMPTY.setParseAction(lambda x: NONE_VALUE)
+EMPTY.setParseAction(_empty_action)
 
 TERM = RDFLITERAL | IRIREF | BLANK_NODE_LABEL | NumericLiteral | BooleanLiteral
 
@@ -58,40 +79,199 @@ ROW.parseWithTabs()
 HEADER = Var + ZeroOrMore(Suppress("\t") + Var)
 HEADER.parseWithTabs()
 
+# Regular expressions for the fast path of the row parser, these follow the
+# terminals of the SPARQL grammar used by ROW above.
+_IRIREF_re = r'<([^<>"{}|^`\\%s]*)>' % "".join("\\x%02X" % i for i in range(33))
+
+_IRIREF_RE = re.compile(_IRIREF_re)
+
+_BLANK_NODE_LABEL_RE = re.compile(
+    "_:([0-9%s](?:[\\.%s]*[%s])?)" % (PN_CHARS_U_re, PN_CHARS_re, PN_CHARS_re),
+    flags=re.U,
+)
+
+# String (STRING_LITERAL2 | STRING_LITERAL1) followed by LANGTAG or ^^IRIREF
+_LITERAL_RE = re.compile(
+    '(?:"((?:[^"\\n\\r\\\\]|\\\\["ntbrf\\\\])*)"'
+    "|'((?:[^'\\n\\r\\\\]|\\\\['ntbrf\\\\])*)')"
+    "(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\\^\\^%s)?" % _IRIREF_re,
+    flags=re.U,
+)
+
+_VAR_RE = re.compile(
+    "[?$]([%s0-9][%s0-9\u00B7\u0300-\u036F\u203F-\u2040]*)"
+    % (PN_CHARS_U_re, PN_CHARS_U_re),
+    flags=re.U,
+)
+
+# sign, then one group each for INTEGER, DECIMAL and DOUBLE
+_NUMERIC_RE = re.compile(
+    r"([+-]?)(?:([0-9]+)|([0-9]*\.[0-9]+)"
+    r"|((?:[0-9]+\.[0-9]*|\.[0-9]+|[0-9]+)[eE][+-]?[0-9]+))"
+)
+
+# datatypes by the index of the matching _NUMERIC_RE group
+_NUMERIC_DATATYPES = {2: XSD.integer, 3: XSD.decimal, 4: XSD.double}
+
+
+@lru_cache(maxsize=8192)
+def _uriref(value):
+    """
+    Returns a URIRef for value, result sets tend to repeat the same IRIs
+    (properties, classes, datatypes) so the instances are shared.
+    """
+    return URIRef(value)
+
+
+def _numeric_literal(field):
+    """
+    Returns the numeric literal for field, or None if it is not one.
+
+    The lexical forms are the same as the ones produced by NumericLiteral.
+    """
+    m = _NUMERIC_RE.fullmatch(field)
+    if m is None:
+        return None
+    index = m.lastindex
+    sign = m.group(1)
+    number = m.group(index)
+    datatype = _NUMERIC_DATATYPES[index]
+    if sign == "-":
+        return neg(RDFLiteral(number, datatype=datatype))
+    if sign == "+" and index == 2:
+        # only INTEGER_POSITIVE keeps the sign
+        return RDFLiteral(field, datatype=datatype)
+    return RDFLiteral(number, datatype=datatype)
+
+
+def _parse_term(field):
+    """
+    Returns the term for a single TSV field, NONE_VALUE for an empty field
+    or None if the field is not recognised.
+    """
+    if not field:
+        return NONE_VALUE
+    c = field[0]
+    if c == "<":
+        m = _IRIREF_RE.fullmatch(field)
+        if m is not None:
+            return _uriref(m.group(1))
+    elif c == "_":
+        m = _BLANK_NODE_LABEL_RE.fullmatch(field)
+        if m is not None:
+            return BNode(m.group(1))
+    elif c == '"' or c == "'":
+        m = _LITERAL_RE.fullmatch(field)
+        if m is not None:
+            string2, string1, lang, datatype = m.groups()
+            string = string1 if string2 is None else string2
+            # like RDFLITERAL, the lexical form is kept as it is
+            return RDFLiteral(
+                decodeUnicodeEscape(string),
+                lang=lang,
+                datatype=None if datatype is None else _uriref(datatype),
+                normalize=False,
+            )
+    elif c in "0123456789+-.":
+        return _numeric_literal(field)
+    elif field == "true" or field == "false":
+        # a new Literal per field, as a shared one could be modified by callers
+        return RDFLiteral(field == "true")
+    return None
+
+
+def _parse_row(line):
+    """
+    Splits a TSV line into its terms without pyparsing.
+
+    Returns None if any of the fields is not recognised, the caller should
+    then fall back to ROW.
+    """
+    row = []
+    for field in line.split("\t"):
+        term = _parse_term(field.strip(" "))
+        if term is None:
+            return None
+        row.append(term)
+    return row
+
+
+def _parse_header(header):
+    """
+    Returns the variables of a TSV header line, only falls back to HEADER if
+    the header is not a plain tab separated list of variables.
+    """
+    variables = []
+    for name in header.split("\t"):
+        m = _VAR_RE.fullmatch(name)
+        if m is None:
+            return list(HEADER.parseString(header, parseAll=True))
+        variables.append(Variable(m.group(1)))
+    return variables
+
+
+def _literal_from_compvalue(t):
+    if t.name != "literal":
+        raise Exception("I dont know how to handle this: %s" % (t,))
+    # plain dict lookups, lang and datatype are usually missing
+    return RDFLiteral(
+        dict.__getitem__(t, "string"),
+        lang=dict.get(t, "lang"),
+        datatype=dict.get(t, "datatype"),
+    )
+
+
+# converters for the tokens produced by ROW, by type,
+# other tokens are already terms
+_CONVERTERS = {CompValue: _literal_from_compvalue}
+
 
 class TSVResultParser(ResultParser):
     def parse(self, source, content_type=None):
 
-        if isinstance(source.read(0), bytes):
+        wrapper = None
+        if isinstance(source, io.BufferedIOBase):
+            # TextIOWrapper iterates over lines much faster than the
+            # codecs reader below
+            source = wrapper = io.TextIOWrapper(source, encoding="utf-8", newline="\n")
+        elif isinstance(source.read(0), bytes):
             # if reading from source returns bytes do utf-8 decoding
             source = codecs.getreader("utf-8")(source)
 
+        try:
+            return self._parse(source)
+        finally:
+            if wrapper is not None:
+                # do not close the underlying stream together with the wrapper
+                wrapper.detach()
+
+    def _parse(self, source):
         r = Result("SELECT")
 
         header = source.readline()
 
-        r.vars = list(HEADER.parseString(header.strip(), parseAll=True))
+        r.vars = _parse_header(header.strip())
         r.bindings = []
-        while True:
-            line = source.readline()
-            if not line:
-                break
+        # r.vars stays a list, the loop zips over a tuple of the same variables
+        variables = tuple(r.vars)
+        append = r.bindings.append
+        convertTerm = self.convertTerm
+        for line in source:
             line = line.strip("\n")
             if line == "":
                 continue
 
-            row = ROW.parseString(line, parseAll=True)
-            r.bindings.append(dict(zip(r.vars, (self.convertTerm(x) for x in row))))
+            row = _parse_row(line)
+            if row is None:
+                row = ROW.parseString(line, parseAll=True)
+            append({v: convertTerm(x) for v, x in zip(variables, row)})
 
         return r
 
     def convertTerm(self, t):
         if t is NONE_VALUE:
             return None
-        if isinstance(t, CompValue):
-            if t.name == "literal":
-                return RDFLiteral(t.string, lang=t.lang, datatype=t.datatype)
-            else:
-                raise Exception("I dont know how to handle this: %s" % (t,))
-        else:
-            return t
+        convert = _CONVERTERS.get(type(t))
+        if convert is not None:
+            return convert(t)
+        return t
@@ -191,7 +191,7 @@ class TestGraphHTTP(unittest.TestCase):
             httpmock.do_get_mock.assert_called()
             assert len(httpmock.do_get_requests) == 10
             for request in httpmock.do_get_requests:
-                self.assertRegex(request.headers.get("Accept"), "text/turtle")
+                self.assertRegex(request.headers["accept"][0], "text/turtle")
 
             request_paths = [request.path for request in httpmock.do_get_requests]
             self.assertEqual(
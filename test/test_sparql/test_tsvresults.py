@@ -1,5 +1,6 @@
 from io import StringIO
 
+from rdflib import XSD, BNode, Literal, URIRef
 from rdflib.plugins.sparql.results.tsvresults import TSVResultParser
 
 
@@ -16,3 +17,37 @@ def test_empty_tsvresults_bindings() -> None:
 
     for idx, row in enumerate(result):
         assert row[idx] is None
+
+
+def test_tsvresults_terms() -> None:
+    source = (
+        "?a\t?b\t?c\t?d\n"
+        '<urn:s>\t_:b0\t"x"@en\t"1"^^<http://www.w3.org/2001/XMLSchema#int>\n'
+        "-1\t1.5\t+1e3\ttrue\n"
+        '"a\\tb"\t"unterminated\tliteral"\t\t<urn:o>\n'
+    )
+
+    result = TSVResultParser().parse(StringIO(source))
+    a, b, c, d = result.vars
+
+    assert result.bindings == [
+        {
+            a: URIRef("urn:s"),
+            b: BNode("b0"),
+            c: Literal("x", lang="en"),
+            d: Literal("1", datatype=XSD.int),
+        },
+        {
+            a: Literal("-1", datatype=XSD.integer),
+            b: Literal("1.5", datatype=XSD.decimal),
+            c: Literal("1e3", datatype=XSD.double),
+            d: Literal(True),
+        },
+        {
+            a: Literal("a\tb"),
+            # tabs are not allowed unescaped, but pyparsing accepts them
+            b: Literal("unterminated\tliteral"),
+            c: None,
+            d: URIRef("urn:o"),
+        },
+    ]
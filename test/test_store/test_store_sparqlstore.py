@@ -117,7 +117,7 @@ class SPARQLStoreFakeDBPediaTestCase(unittest.TestCase):
             for _, uri in self.graph.namespaces():
                 assert mquery.count(f"<{uri}>") == 1
         self.assertEqual(self.httpmock.do_get_mock.call_count, 1)
-        req = self.httpmock.do_get_requests.pop(0)
+        req = self.httpmock.do_get_requests.popleft()
         self.assertRegex(req.path, r"^/sparql")
         self.assertIn(query, req.path_query["query"][0])
 
@@ -180,7 +180,7 @@ class SPARQLStoreFakeDBPediaTestCase(unittest.TestCase):
             assert type(i[0]) == Literal, i[0].n3()
 
         self.assertEqual(self.httpmock.do_get_mock.call_count, 1)
-        req = self.httpmock.do_get_requests.pop(0)
+        req = self.httpmock.do_get_requests.popleft()
         self.assertRegex(req.path, r"^/sparql")
         self.assertIn(query, req.path_query["query"][0])
 
@@ -204,7 +204,7 @@ SELECT ?label WHERE { ?s a xyzzy:Concept ; xyzzy:prefLabel ?label . } LIMIT 10""
         with self.assertRaises(ValueError):
             self.graph.query(query)
         self.assertEqual(self.httpmock.do_get_mock.call_count, 1)
-        req = self.httpmock.do_get_requests.pop(0)
+        req = self.httpmock.do_get_requests.popleft()
         self.assertRegex(req.path, r"^/sparql")
         self.assertIn(query, req.path_query["query"][0])
 
@@ -267,7 +267,7 @@ SELECT ?label WHERE { ?s a xyzzy:Concept ; xyzzy:prefLabel ?label . } LIMIT 10""
         for i in res:
             assert type(i[0]) == Literal, i[0].n3()
         self.assertEqual(self.httpmock.do_get_mock.call_count, 1)
-        req = self.httpmock.do_get_requests.pop(0)
+        req = self.httpmock.do_get_requests.popleft()
         self.assertRegex(req.path, r"^/sparql")
         self.assertIn(query, req.path_query["query"][0])
 
@@ -331,7 +331,7 @@ SELECT ?label WHERE { ?s a xyzzy:Concept ; xyzzy:prefLabel ?label . } LIMIT 10""
         for i in res:
             assert type(i[0]) == Literal, i[0].n3()
         self.assertEqual(self.httpmock.do_get_mock.call_count, 1)
-        req = self.httpmock.do_get_requests.pop(0)
+        req = self.httpmock.do_get_requests.popleft()
         self.assertRegex(req.path, r"^/sparql")
         self.assertIn(query, req.path_query["query"][0])
 
@@ -398,7 +398,7 @@ SELECT ?label WHERE { ?s a xyzzy:Concept ; xyzzy:prefLabel ?label . } LIMIT 10""
 
         self.assertEqual(self.httpmock.do_get_mock.call_count, 2)
         for _ in range(2):
-            req = self.httpmock.do_get_requests.pop(0)
+            req = self.httpmock.do_get_requests.popleft()
             self.assertRegex(req.path, r"^/sparql")
             self.assertIn(query, req.path_query["query"][0])
 
@@ -54,6 +54,6 @@ class TestSPARQLConnector(unittest.TestCase):
         # to do updates.
         graph.update(update_statement)
         self.assertEqual(self.httpmock.call_count, 1)
-        req = self.httpmock.do_post_requests.pop(0)
+        req = self.httpmock.do_post_requests.popleft()
         self.assertEqual(req.parsed_path.path, self.update_path)
-        self.assertIn("application/sparql-update", req.headers.get("content-type"))
+        self.assertIn("application/sparql-update", req.headers["content-type"][0])
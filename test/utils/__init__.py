@@ -7,29 +7,37 @@ The tests for test utilities should be placed inside `test.utils.test`
 
 from __future__ import print_function
 
+import atexit
 import datetime
 import email.message
 import os
+import queue
 import random
 import sys
 import unittest
+from collections import deque
 from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 from http.server import BaseHTTPRequestHandler, HTTPServer, SimpleHTTPRequestHandler
 from pathlib import PurePath, PureWindowsPath
 from threading import Thread
 from traceback import print_exc
-from types import TracebackType
+from types import MappingProxyType, TracebackType
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
     Collection,
+    Deque,
     Dict,
+    FrozenSet,
     Generator,
+    Hashable,
     Iterable,
     Iterator,
     List,
-    NamedTuple,
+    Mapping,
     Optional,
     Set,
     Tuple,
@@ -38,7 +46,6 @@ from typing import (
     Union,
     cast,
 )
-from unittest.mock import MagicMock, Mock
 from urllib.error import HTTPError
 from urllib.parse import ParseResult, parse_qs, unquote, urlparse
 from urllib.request import urlopen
@@ -57,15 +64,30 @@ from rdflib.term import Identifier, Literal, Node, URIRef
 PluginT = TypeVar("PluginT")
 
 
-def get_unique_plugins(
-    type: Type[PluginT],
-) -> Dict[Type[PluginT], Set[Plugin[PluginT]]]:
-    result: Dict[Type[PluginT], Set[Plugin[PluginT]]] = {}
+@lru_cache(maxsize=None)
+def _unique_plugins(type: Type[Any]) -> Mapping[Type[Any], FrozenSet[Plugin[Any]]]:
+    result: Dict[Type[Any], Set[Plugin[Any]]] = {}
     for plugin in rdflib.plugin.plugins(None, type):
         cls = plugin.getClass()
         plugins = result.setdefault(cls, set())
         plugins.add(plugin)
-    return result
+    return MappingProxyType(
+        {cls: frozenset(plugins) for cls, plugins in result.items()}
+    )
+
+
+def get_unique_plugins(
+    type: Type[PluginT],
+) -> Mapping[Type[PluginT], FrozenSet[Plugin[PluginT]]]:
+    """
+    Returns the registered plugins of the given type, grouped by the class
+    they load.
+
+    Results are cached per type, so plugins registered after the first call
+    for a type are not seen until ``_unique_plugins.cache_clear()`` is called.
+    """
+    # mypy does not consider classes Hashable, which lru_cache wants.
+    return _unique_plugins(cast(Hashable, type))
 
 
 def get_unique_plugin_names(type: Type[PluginT]) -> Set[str]:
@@ -83,8 +105,10 @@ if TYPE_CHECKING:
 def get_random_ip(parts: List[str] = None) -> str:
     if parts is None:
         parts = ["127"]
-    for _ in range(4 - len(parts)):
-        parts.append(f"{random.randint(0, 255)}")
+    missing = 4 - len(parts)
+    if missing > 0:
+        bits = random.getrandbits(8 * missing)
+        parts.extend(f"{(bits >> (8 * i)) & 0xFF}" for i in range(missing))
     return ".".join(parts)
 
 
@@ -128,24 +152,38 @@ class GraphHelper:
         """
         Return the identifiers of the provided nodes.
         """
-        result = []
-        for node in nodes:
-            result.append(cls.identifier(node))
-        return tuple(result)
+        return tuple(map(cls.identifier, nodes))
 
     @classmethod
     def triple_set(
         cls, graph: Graph, exclude_blanks: bool = False
     ) -> IdentifierTripleSet:
-        result = set()
-        for sn, pn, on in graph.triples((None, None, None)):
-            s, p, o = cls.identifiers((sn, pn, on))
-            if exclude_blanks and (
-                isinstance(s, BNode) or isinstance(p, BNode) or isinstance(o, BNode)
-            ):
-                continue
-            result.add((s, p, o))
-        return result
+        # Formulae from N3 documents show up as Graph terms, so the
+        # identifier conversion can't be skipped.
+        identifier = cls.identifier
+        if type(graph).triples is Graph.triples:
+            # Graph.triples only unwraps the store's ((s, p, o), contexts)
+            # results, so read them from the store directly. Subclasses such as
+            # ConjunctiveGraph pick the store context differently and are left
+            # to their own triples().
+            triples = (
+                (identifier(s), identifier(p), identifier(o))
+                for (s, p, o), _ in graph.store.triples(
+                    (None, None, None), context=graph
+                )
+            )
+        else:
+            triples = (
+                (identifier(s), identifier(p), identifier(o))
+                for s, p, o in graph.triples((None, None, None))
+            )
+        if not exclude_blanks:
+            return set(triples)
+        return {
+            triple
+            for triple in triples
+            if not any(isinstance(node, BNode) for node in triple)
+        }
 
     @classmethod
     def triple_sets(
@@ -154,10 +192,7 @@ class GraphHelper:
         """
         Extracts the set of all triples from the supplied Graph.
         """
-        result: List[IdentifierTripleSet] = []
-        for graph in graphs:
-            result.append(cls.triple_set(graph, exclude_blanks))
-        return result
+        return [cls.triple_set(graph, exclude_blanks) for graph in graphs]
 
     @classmethod
     def quad_set(
@@ -166,18 +201,16 @@ class GraphHelper:
         """
         Extracts the set of all quads from the supplied ConjunctiveGraph.
         """
-        result = set()
-        for sn, pn, on, gn in graph.quads((None, None, None, None)):
-            s, p, o, g = cls.identifiers((sn, pn, on, gn))
-            if exclude_blanks and (
-                isinstance(s, BNode)
-                or isinstance(p, BNode)
-                or isinstance(o, BNode)
-                or isinstance(g, BNode)
-            ):
-                continue
-            result.add((s, p, o, g))
-        return result
+        identifier = cls.identifier
+        quads = (
+            (identifier(s), identifier(p), identifier(o), identifier(g))
+            for s, p, o, g in graph.quads((None, None, None, None))
+        )
+        if not exclude_blanks:
+            return set(quads)
+        return {
+            quad for quad in quads if not any(isinstance(node, BNode) for node in quad)
+        }
 
     @classmethod
     def triple_or_quad_set(
@@ -231,11 +264,8 @@ class GraphHelper:
         prefix: str = "  ",
         sort: bool = False,
     ) -> str:
-        items = []
         use_item_set = sorted(item_set) if sort else item_set
-        for item in use_item_set:
-            items.append(f"{prefix}{item}")
-        return "\n".join(items)
+        return "\n".join(f"{prefix}{item}" for item in use_item_set)
 
     @classmethod
     def format_graph_set(
@@ -267,24 +297,54 @@ class GraphHelper:
         assert rdflib.compare.isomorphic(lhs, rhs), format_report(message)
 
     @classmethod
-    def strip_literal_datatypes(cls, graph: Graph, datatypes: Set[URIRef]) -> None:
+    def strip_literal_datatypes(
+        cls, graph: Graph, datatypes: Collection[URIRef]
+    ) -> None:
         """
         Strips datatypes in the provided set from literals in the graph.
         """
+        datatypes = frozenset(datatypes)
         for object in graph.objects():
-            if not isinstance(object, Literal):
-                continue
-            if object.datatype is None:
-                continue
-            if object.datatype in datatypes:
+            # ``_datatype`` is a slot on Literal; reading it directly skips the
+            # ``datatype`` property.
+            if isinstance(object, Literal) and object._datatype in datatypes:
                 object._datatype = None
 
 
 GenericT = TypeVar("GenericT", bound=Any)
 
 
-def make_spypair(method: GenericT) -> Tuple[GenericT, Mock]:
-    m = MagicMock()
+class _Spy:
+    """
+    A minimal call recorder used in place of :class:`unittest.mock.Mock` by
+    :func:`make_spypair`.
+    """
+
+    __slots__ = ("call_count", "calls")
+
+    def __init__(self) -> None:
+        self.call_count = 0
+        self.calls: List[Tuple[Tuple[Any, ...], Dict[str, Any]]] = []
+
+    def __call__(self, *args: Any, **kwargs: Any) -> None:
+        self.call_count += 1
+        self.calls.append((args, kwargs))
+
+    def reset_mock(self) -> None:
+        self.call_count = 0
+        self.calls.clear()
+
+    def assert_called(self) -> None:
+        assert self.call_count > 0, "Expected spy to have been called."
+
+    def assert_called_once(self) -> None:
+        assert (
+            self.call_count == 1
+        ), f"Expected spy to have been called once. Called {self.call_count} times."
+
+
+def make_spypair(method: GenericT) -> Tuple[GenericT, _Spy]:
+    m = _Spy()
 
     def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
         m(*args, **kwargs)
@@ -298,15 +358,53 @@ HeadersT = Dict[str, List[str]]
 PathQueryT = Dict[str, List[str]]
 
 
-class MockHTTPRequests(NamedTuple):
+def snapshot_headers(message: email.message.Message) -> HeadersT:
+    """
+    Copies the headers of a message into a plain dictionary keyed by
+    lowercased header name.
+    """
+    result: HeadersT = {}
+    for name, value in message.items():
+        result.setdefault(name.lower(), []).append(value)
+    return result
+
+
+# NOTE: dataclass(slots=True) needs Python 3.10, so __slots__ is declared by
+# hand on these classes, which works as their fields have no defaults.
+@dataclass
+class MockHTTPRequests:
+    """
+    A request received by SimpleHTTPMock.
+
+    ``headers`` maps lowercased header names to all of their values.
+    ``parsed_path`` and ``path_query`` are only parsed when first accessed.
+    """
+
+    __slots__ = ("method", "path", "headers", "_parsed_path", "_path_query")
     method: str
     path: str
-    parsed_path: ParseResult
-    path_query: PathQueryT
-    headers: email.message.Message
+    headers: HeadersT
+
+    def __post_init__(self) -> None:
+        self._parsed_path: Optional[ParseResult] = None
+        self._path_query: Optional[PathQueryT] = None
 
+    @property
+    def parsed_path(self) -> ParseResult:
+        if self._parsed_path is None:
+            self._parsed_path = urlparse(self.path)
+        return self._parsed_path
+
+    @property
+    def path_query(self) -> PathQueryT:
+        if self._path_query is None:
+            self._path_query = parse_qs(self.parsed_path.query)
+        return self._path_query
 
-class MockHTTPResponse(NamedTuple):
+
+@dataclass
+class MockHTTPResponse:
+    __slots__ = ("status_code", "reason_phrase", "body", "headers")
     status_code: int
     reason_phrase: str
     body: bytes
@@ -319,10 +417,10 @@ class SimpleHTTPMock:
 
     NOTE: Currently only the GET and POST methods is supported.
 
-    Objects of this class has a list of responses for each method (GET, POST, etc...)
+    Objects of this class has a queue of responses for each method (GET, POST, etc...)
     and returns these responses for these methods in sequence.
 
-    All request received are appended to a method specific list.
+    All request received are appended to a method specific queue.
 
     Example usage:
     >>> httpmock = SimpleHTTPMock()
@@ -344,61 +442,72 @@ class SimpleHTTPMock:
     ...    assert http_error.code == 404
     ...
     ...    # get and validate request that the mock received
-    ...    req = httpmock.do_get_requests.pop(0)
+    ...    req = httpmock.do_get_requests.popleft()
     ...    assert req.path == "/bad/path"
     """
 
+    __slots__ = (
+        "do_get_requests",
+        "do_get_responses",
+        "do_post_requests",
+        "do_post_responses",
+        "Handler",
+        "do_get_mock",
+        "do_post_mock",
+    )
+
     # TODO: add additional methods (PUT, PATCH, ...) similar to GET and POST
     def __init__(self):
-        self.do_get_requests: List[MockHTTPRequests] = []
-        self.do_get_responses: List[MockHTTPResponse] = []
+        self.do_get_requests: Deque[MockHTTPRequests] = deque()
+        self.do_get_responses: Deque[MockHTTPResponse] = deque()
 
-        self.do_post_requests: List[MockHTTPRequests] = []
-        self.do_post_responses: List[MockHTTPResponse] = []
+        self.do_post_requests: Deque[MockHTTPRequests] = deque()
+        self.do_post_responses: Deque[MockHTTPResponse] = deque()
 
         _http_mock = self
 
         class Handler(SimpleHTTPRequestHandler):
             http_mock = _http_mock
+            # buffer the response so the headers and the body are sent
+            # together when the handler finishes
+            wbufsize = -1
 
             def _do_GET(self):
-                parsed_path = urlparse(self.path)
-                path_query = parse_qs(parsed_path.query)
+                http_mock = self.http_mock
+                send_header = self.send_header
                 request = MockHTTPRequests(
-                    "GET", self.path, parsed_path, path_query, self.headers
+                    "GET", self.path, snapshot_headers(self.headers)
                 )
-                self.http_mock.do_get_requests.append(request)
+                http_mock.do_get_requests.append(request)
 
-                response = self.http_mock.do_get_responses.pop(0)
+                response = http_mock.do_get_responses.popleft()
                 self.send_response(response.status_code, response.reason_phrase)
                 for header, values in response.headers.items():
                     for value in values:
-                        self.send_header(header, value)
+                        send_header(header, value)
                 self.end_headers()
 
                 self.wfile.write(response.body)
-                self.wfile.flush()
                 return
 
             (do_GET, do_GET_mock) = make_spypair(_do_GET)
 
             def _do_POST(self):
-                parsed_path = urlparse(self.path)
-                path_query = parse_qs(parsed_path.query)
+                http_mock = self.http_mock
+                send_header = self.send_header
                 request = MockHTTPRequests(
-                    "POST", self.path, parsed_path, path_query, self.headers
+                    "POST", self.path, snapshot_headers(self.headers)
                 )
-                self.http_mock.do_post_requests.append(request)
+                http_mock.do_post_requests.append(request)
 
-                response = self.http_mock.do_post_responses.pop(0)
+                response = http_mock.do_post_responses.popleft()
                 self.send_response(response.status_code, response.reason_phrase)
                 for header, values in response.headers.items():
                     for value in values:
-                        self.send_header(header, value)
+                        send_header(header, value)
                 self.end_headers()
 
                 self.wfile.write(response.body)
-                self.wfile.flush()
                 return
 
             (do_POST, do_POST_mock) = make_spypair(_do_POST)
@@ -442,7 +551,7 @@ class SimpleHTTPMockTests(unittest.TestCase):
             assert raised.exception.code == 404
 
             # get and validate request that the mock received
-            req = httpmock.do_get_requests.pop(0)
+            req = httpmock.do_get_requests.popleft()
             self.assertEqual(req.path, "/bad/path")
 
             # send a request to get the second response
@@ -458,6 +567,22 @@ class SimpleHTTPMockTests(unittest.TestCase):
             )
 
 
+_served_pool: Dict[str, "queue.SimpleQueue[Tuple[HTTPServer, Thread]]"] = {}
+
+
+@atexit.register
+def _close_served_pool() -> None:
+    for pool in _served_pool.values():
+        while True:
+            try:
+                server, server_thread = pool.get_nowait()
+            except queue.Empty:
+                break
+            server.shutdown()
+            server.socket.close()
+            server_thread.join()
+
+
 class ServedSimpleHTTPMock(SimpleHTTPMock, AbstractContextManager):
     """
     ServedSimpleHTTPMock is a ServedSimpleHTTPMock with a HTTP server.
@@ -480,24 +605,41 @@ class ServedSimpleHTTPMock(SimpleHTTPMock, AbstractContextManager):
     ...    assert http_error.code == 404
     ...
     ...    # get and validate request that the mock received
-    ...    req = httpmock.do_get_requests.pop(0)
+    ...    req = httpmock.do_get_requests.popleft()
     ...    assert req.path == "/bad/path"
     """
 
+    __slots__ = ("server", "server_thread", "_host", "_stopped")
+
     def __init__(self, host: str = "127.0.0.1"):
         super().__init__()
-        self.server = HTTPServer((host, 0), self.Handler)
-        self.server_thread = Thread(target=self.server.serve_forever)
-        self.server_thread.daemon = True
-        self.server_thread.start()
+        self._host = host
+        self._stopped = False
+        try:
+            self.server, self.server_thread = _served_pool[host].get_nowait()
+            self.server.RequestHandlerClass = self.Handler
+        except (KeyError, queue.Empty):
+            self.server = HTTPServer((host, 0), self.Handler)
+            self.server_thread = Thread(target=self.server.serve_forever)
+            self.server_thread.daemon = True
+            self.server_thread.start()
 
     def stop(self) -> None:
-        self.server.shutdown()
-        self.server.socket.close()
-        self.server_thread.join()
+        if self._stopped:
+            return
+        self._stopped = True
+        # The server keeps running and goes back to the pool for the next
+        # instance. Until then, BaseHTTPRequestHandler answers everything with
+        # 501 as it has no do_* methods.
+        self.server.RequestHandlerClass = BaseHTTPRequestHandler
+        _served_pool.setdefault(self._host, queue.SimpleQueue()).put_nowait(
+            (self.server, self.server_thread)
+        )
 
     @property
     def address_string(self) -> str:
+        if self._stopped:
+            raise RuntimeError("the mock has been stopped and no longer has a server")
         (host, port) = self.server.server_address
         return f"{host}:{port}"
 
@@ -535,7 +677,7 @@ class ServedSimpleHTTPMockTests(unittest.TestCase):
             assert raised.exception.code == 404
 
             # get and validate request that the mock received
-            req = httpmock.do_get_requests.pop(0)
+            req = httpmock.do_get_requests.popleft()
             self.assertEqual(req.path, "/bad/path")
 
             # send a request to get the second response
@@ -603,18 +745,14 @@ def pytest_mark_filter(
     """
     Adds marks to test parameters. Useful for adding xfails to test parameters.
     """
+    no_marks: Marks = ()
     for param_set in param_sets:
         if isinstance(param_set, ParameterSet):
-            # param_set.marks = [*param_set.marks, *marks.get(param_set.values, ())]
+            values = cast(ParamsT, param_set.values)
             yield pytest.param(
-                *param_set.values,
+                *values,
                 id=param_set.id,
-                marks=[
-                    *param_set.marks,
-                    *mark_dict.get(cast(ParamsT, param_set.values), cast(Marks, ())),
-                ],
+                marks=(*param_set.marks, *mark_dict.get(values, no_marks)),
             )
         else:
-            yield pytest.param(
-                *param_set, marks=mark_dict.get(param_set, cast(Marks, ()))
-            )
+            yield pytest.param(*param_set, marks=mark_dict.get(param_set, no_marks))